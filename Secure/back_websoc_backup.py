@@ -4,7 +4,7 @@ from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime,
 from sqlalchemy.orm import sessionmaker, Session, relationship, declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Set, Callable, Awaitable
 from pydantic import BaseModel
 import requests
 import logging
@@ -204,19 +204,64 @@ class SystemMetrics(Base):
 
 # ==================== REAL-TIME DASHBOARD MANAGER ====================
 
+# Seconds between metric pushes to /ws/dashboard clients
+METRICS_PUBLISH_INTERVAL = float(os.getenv("METRICS_PUBLISH_INTERVAL", "5"))
+
+# Messages buffered per client before the oldest ones are dropped
+WEBSOCKET_SEND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "32"))
+
+# Metric paths that change on every tick; they ride along but never trigger a patch
+VOLATILE_METRIC_PATHS = ("/last_updated", "/websocket_stats")
+
+def diff_metrics(old: Dict[str, Any], new: Dict[str, Any], path: str = "") -> List[Dict[str, Any]]:
+    """JSON-patch operations that turn the old metrics dict into the new one"""
+    ops = []
+    for key in old.keys() - new.keys():
+        ops.append({"op": "remove", "path": f"{path}/{_pointer_token(key)}"})
+    
+    for key, value in new.items():
+        pointer = f"{path}/{_pointer_token(key)}"
+        if key not in old:
+            ops.append({"op": "add", "path": pointer, "value": value})
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            ops.extend(diff_metrics(old[key], value, pointer))
+        elif value != old[key]:
+            ops.append({"op": "replace", "path": pointer, "value": value})
+    
+    return ops
+
+def _pointer_token(key: Any) -> str:
+    """Escape a dict key for use in a JSON pointer"""
+    return str(key).replace("~", "~0").replace("/", "~1")
+
 class RealTimeDashboardManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
+        # Clients that connected with ?protocol=patch; the rest get full "update" messages
+        self.patch_clients: Set[WebSocket] = set()
+        self.send_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self.writer_tasks: Dict[WebSocket, asyncio.Task] = {}
         self.last_metrics = {}
+        self.last_metrics_at = 0.0
+        self.sequence = 0
+        self.publisher_task: Optional[asyncio.Task] = None
         self.connection_stats = {
             "total_connections": 0,
             "peak_connections": 0,
-            "messages_sent": 0
+            "messages_sent": 0,
+            "messages_dropped": 0,
+            "queued_messages": 0,
+            "peak_queue_depth": 0
         }
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        queue = asyncio.Queue(maxsize=WEBSOCKET_SEND_QUEUE_SIZE)
+        self.active_connections.add(websocket)
+        if websocket.query_params.get("protocol") == "patch":
+            self.patch_clients.add(websocket)
+        self.send_queues[websocket] = queue
+        self.writer_tasks[websocket] = asyncio.create_task(self._writer(websocket, queue))
         self.connection_stats["total_connections"] += 1
         self.connection_stats["peak_connections"] = max(
             self.connection_stats["peak_connections"], 
@@ -225,35 +270,187 @@ class RealTimeDashboardManager:
         logger.info(f"New WebSocket connection. Total: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
+        self.patch_clients.discard(websocket)
+        queue = self.send_queues.pop(websocket, None)
+        if queue is not None:
+            self.connection_stats["queued_messages"] -= queue.qsize()
+        task = self.writer_tasks.pop(websocket, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
         logger.info(f"WebSocket disconnected. Total: {len(self.active_connections)}")
     
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients"""
-        disconnected = []
-        for connection in self.active_connections:
+    async def _writer(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Drain one client's send queue so a slow socket only delays itself"""
+        while True:
+            message = await queue.get()
+            self.connection_stats["queued_messages"] -= 1
             try:
-                await connection.send_json(message)
+                await websocket.send_json(message)
                 self.connection_stats["messages_sent"] += 1
             except Exception as e:
                 logger.error(f"Error sending to WebSocket: {e}")
-                disconnected.append(connection)
+                self.disconnect(websocket)
+                return
+    
+    def _enqueue(self, message: dict, websocket: WebSocket):
+        """Queue a message for a client; a full queue is replaced by a fresh snapshot.
+        
+        Dropping single messages could drop a snapshot and leave the client with
+        nothing to apply patches to, so on overflow the whole backlog goes and the
+        client restarts from the current snapshot (which already includes any patch).
+        """
+        queue = self.send_queues.get(websocket)
+        if queue is None:
+            return
+        
+        if queue.full():
+            dropped = queue.qsize()
+            while not queue.empty():
+                queue.get_nowait()
+            self.connection_stats["queued_messages"] -= dropped
+            self.connection_stats["messages_dropped"] += dropped
+            
+            if self.last_metrics:
+                self._put(queue, self._snapshot())
+            if message.get("type") in ("patch", "update", "initial"):
+                return
         
-        for connection in disconnected:
-            self.disconnect(connection)
+        self._put(queue, message)
+    
+    def _put(self, queue: asyncio.Queue, message: dict):
+        queue.put_nowait(message)
+        self.connection_stats["queued_messages"] += 1
+        self.connection_stats["peak_queue_depth"] = max(
+            self.connection_stats["peak_queue_depth"],
+            queue.qsize()
+        )
+    
+    async def broadcast(self, message: dict):
+        """Broadcast message to all connected clients"""
+        for connection in list(self.active_connections):
+            self._enqueue(message, connection)
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send message to specific client"""
+        self._enqueue(message, websocket)
+    
+    async def _compute_metrics(self) -> Dict[str, Any]:
+        """Compute metrics detached from the live stats dicts they reference"""
+        db = SessionLocal()
         try:
-            await websocket.send_json(message)
-            self.connection_stats["messages_sent"] += 1
-        except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+            metrics = await get_realtime_metrics(db)
+        finally:
+            db.close()
+        return json.loads(json.dumps(metrics, default=str))
+    
+    async def snapshot_message(self, websocket: Optional[WebSocket] = None) -> Dict[str, Any]:
+        """Full metrics snapshot tagged with the current sequence number.
+        
+        The publisher idles without clients, so metrics older than one publish
+        interval are recomputed first; other clients get the change as a patch
+        and websocket (the requester) gets it through the snapshot.
+        """
+        if not self.last_metrics or time.time() - self.last_metrics_at >= METRICS_PUBLISH_INTERVAL:
+            await self._refresh(include_volatile=True, exclude=websocket)
+        return self._snapshot()
+    
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": "initial",
+            "seq": self.sequence,
+            "data": self.last_metrics,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    async def _publish_loop(self, interval: float):
+        """Compute metrics once per interval and broadcast them to every client"""
+        while True:
+            await asyncio.sleep(interval)
+            if not self.active_connections:
+                continue
+            
+            try:
+                await self._refresh()
+            except Exception as e:
+                logger.error(f"Error publishing metrics: {e}")
+    
+    async def _refresh(self, include_volatile: bool = False, exclude: Optional[WebSocket] = None):
+        """Recompute metrics and patch connected clients if they changed"""
+        metrics = await self._compute_metrics()
+        self.last_metrics_at = time.time()
+        ops = diff_metrics(self.last_metrics, metrics)
+        
+        # Only send if something besides the volatile fields changed
+        if not any(include_volatile or not op["path"].startswith(VOLATILE_METRIC_PATHS) for op in ops):
+            return
+        
+        self.last_metrics = metrics
+        self.sequence += 1
+        timestamp = datetime.utcnow().isoformat()
+        patch = {
+            "type": "patch",
+            "seq": self.sequence,
+            "ops": ops,
+            "timestamp": timestamp
+        }
+        update = {
+            "type": "update",
+            "data": metrics,
+            "timestamp": timestamp
+        }
+        for connection in list(self.active_connections):
+            if connection is not exclude:
+                self._enqueue(patch if connection in self.patch_clients else update, connection)
+    
+    def start_publisher(self, interval: float = METRICS_PUBLISH_INTERVAL):
+        """Start the shared metrics publisher task"""
+        if self.publisher_task is None or self.publisher_task.done():
+            self.publisher_task = asyncio.create_task(self._publish_loop(interval))
+    
+    async def stop_publisher(self):
+        """Cancel the metrics publisher task"""
+        if self.publisher_task is not None:
+            self.publisher_task.cancel()
+            try:
+                await self.publisher_task
+            except asyncio.CancelledError:
+                pass
+            self.publisher_task = None
 
 dashboard_manager = RealTimeDashboardManager()
 
+# ==================== RISK EVENT BUS ====================
+
+class RiskEventBus:
+    """In-process publish/subscribe channel for newly stored risks"""
+    
+    def __init__(self):
+        self.subscribers: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+    
+    def subscribe(self, handler: Callable[[Dict[str, Any]], Awaitable[None]]):
+        self.subscribers.append(handler)
+    
+    async def publish(self, event: Dict[str, Any]):
+        """Deliver an event to every subscriber; one failing handler does not block the rest"""
+        for handler in list(self.subscribers):
+            try:
+                await handler(event)
+            except Exception as e:
+                logger.error(f"Error handling risk event: {e}")
+
+risk_event_bus = RiskEventBus()
+
+async def push_risk_alert(event: Dict[str, Any]):
+    """Push a risk event to dashboard clients as an alert"""
+    await dashboard_manager.broadcast({
+        "type": "alert",
+        "data": event,
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+risk_event_bus.subscribe(push_risk_alert)
+
 # ==================== DATABASE INITIALIZATION ====================
 
 def init_database():
@@ -903,6 +1100,7 @@ class DrugETL:
             
             analyzer = AdvancedRiskAnalyzer()
             risks_added = 0
+            critical_risks = []
             
             for other_drug in other_drugs:
                 # Skip if already analyzed
@@ -950,10 +1148,24 @@ class DrugETL:
                     )
                     db.add(confusion_risk)
                     risks_added += 1
+                    if confusion_risk.risk_category == "critical":
+                        critical_risks.append((confusion_risk, other_drug))
             
             db.commit()
             logger.info(f"Analyzed {new_drug.brand_name} against {len(other_drugs)} drugs, found {risks_added} risks")
             
+            # Publish critical risks only once they are committed
+            for confusion_risk, other_drug in critical_risks:
+                await risk_event_bus.publish({
+                    "event": "critical_risk",
+                    "risk_id": confusion_risk.id,
+                    "source_drug": new_drug.brand_name,
+                    "target_drug": other_drug.brand_name,
+                    "combined_risk": round(confusion_risk.combined_risk, 1),
+                    "risk_category": confusion_risk.risk_category,
+                    "risk_reason": confusion_risk.risk_reason
+                })
+            
         except Exception as e:
             db.rollback()
             logger.error(f"Error in analyze_against_all_drugs: {e}")
@@ -1441,63 +1653,24 @@ async def websocket_dashboard(websocket: WebSocket):
     await dashboard_manager.connect(websocket)
     
     try:
-        db = SessionLocal()
-        
-        try:
-            # Send initial metrics
-            metrics = await get_realtime_metrics(db)
-            await websocket.send_json({
-                "type": "initial",
-                "data": metrics,
-                "timestamp": datetime.utcnow().isoformat()
-            })
-            
-            # Keep connection alive and send updates
-            last_update = time.time()
-            last_metrics = metrics
-            
-            while True:
-                try:
-                    # Check for ping messages
-                    try:
-                        data = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-                        if data == "ping":
-                            await websocket.send_json({
-                                "type": "pong", 
-                                "timestamp": datetime.utcnow().isoformat()
-                            })
-                    except asyncio.TimeoutError:
-                        pass
-                    
-                    # Send updates every 5 seconds
-                    current_time = time.time()
-                    if current_time - last_update >= 5:
-                        new_metrics = await get_realtime_metrics(db)
-                        
-                        # Only send if metrics changed
-                        if new_metrics != last_metrics:
-                            await websocket.send_json({
-                                "type": "update",
-                                "data": new_metrics,
-                                "timestamp": datetime.utcnow().isoformat()
-                            })
-                            last_metrics = new_metrics
-                        
-                        last_update = current_time
-                    
-                    await asyncio.sleep(0.1)
-                    
-                except WebSocketDisconnect:
-                    break
-                except Exception as e:
-                    logger.error(f"WebSocket error: {e}")
-                    break
-                    
-        finally:
-            db.close()
-            
+        # Send initial snapshot; patches (or full updates) come from the shared publisher
+        await dashboard_manager.send_personal_message(await dashboard_manager.snapshot_message(websocket), websocket)
+        
+        # Keep connection alive, answer pings and resend the snapshot on request
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await dashboard_manager.send_personal_message({
+                    "type": "pong", 
+                    "timestamp": datetime.utcnow().isoformat()
+                }, websocket)
+            elif data == "resync":
+                await dashboard_manager.send_personal_message(await dashboard_manager.snapshot_message(websocket), websocket)
+                
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
-        logger.error(f"WebSocket setup error: {e}")
+        logger.error(f"WebSocket error: {e}")
     finally:
         dashboard_manager.disconnect(websocket)
 
@@ -1745,10 +1918,18 @@ async def startup_event():
     print("   2. Search: curl http://localhost:8000/api/search/lamictal")
     print("   3. Check dashboard: http://localhost:8000/api/metrics")
     
+    # Start the shared real-time metrics publisher
+    dashboard_manager.start_publisher()
+    
     print("="*60)
     print("✅ Medication Safety Guard v3.0 is ready!")
     print("="*60 + "\n")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Application shutdown event"""
+    await dashboard_manager.stop_publisher()
+
 # ==================== MAIN EXECUTION ====================
 
 if __name__ == "__main__":
@@ -1781,6 +1781,8 @@ if 'search_results' not in st.session_state:
     st.session_state.search_results = []
 if 'dashboard_data' not in st.session_state:
     st.session_state.dashboard_data = {}
+if 'etag_cache' not in st.session_state:
+    st.session_state.etag_cache = {}
 if 'selected_risk' not in st.session_state:
     st.session_state.selected_risk = "all"
 if 'realtime_metrics' not in st.session_state:
@@ -3499,28 +3501,46 @@ def load_examples():
     except Exception as e:
         return False
 
+def get_with_etag(path, timeout=None):
+    """GET a backend JSON resource, reusing the last copy when the backend answers 304"""
+    cached = st.session_state.etag_cache.get(path)
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+    
+    response = requests.get(f"{BACKEND_URL}{path}", headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached:
+        return cached["data"]
+    
+    if response.status_code == 200:
+        data = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            st.session_state.etag_cache[path] = {"etag": etag, "data": data}
+        return data
+    
+    return None
+
 def load_dashboard_data():
     """Load dashboard analytics data"""
     try:
         # Load metrics
-        metrics_response = requests.get(f"{BACKEND_URL}/api/metrics")
-        if metrics_response.status_code == 200:
-            st.session_state.dashboard_data['metrics'] = metrics_response.json()
+        metrics = get_with_etag("/api/metrics")
+        if metrics is not None:
+            st.session_state.dashboard_data['metrics'] = metrics
         
         # Load top risks
-        risks_response = requests.get(f"{BACKEND_URL}/api/top-risks?limit=10")
-        if risks_response.status_code == 200:
-            st.session_state.dashboard_data['top_risks'] = risks_response.json()
+        top_risks = get_with_etag("/api/top-risks?limit=10")
+        if top_risks is not None:
+            st.session_state.dashboard_data['top_risks'] = top_risks
         
         # Load risk breakdown
-        breakdown_response = requests.get(f"{BACKEND_URL}/api/risk-breakdown")
-        if breakdown_response.status_code == 200:
-            st.session_state.dashboard_data['breakdown'] = breakdown_response.json()
+        breakdown = get_with_etag("/api/risk-breakdown")
+        if breakdown is not None:
+            st.session_state.dashboard_data['breakdown'] = breakdown
         
         # Load heatmap data
-        heatmap_response = requests.get(f"{BACKEND_URL}/api/heatmap?limit=15")
-        if heatmap_response.status_code == 200:
-            st.session_state.dashboard_data['heatmap'] = heatmap_response.json()
+        heatmap = get_with_etag("/api/heatmap?limit=15")
+        if heatmap is not None:
+            st.session_state.dashboard_data['heatmap'] = heatmap
             
         return True
     except Exception as e:
@@ -4979,10 +4999,9 @@ def render_realtime_tab():
     # FETCH REAL-TIME DATA (NO CHANGE)
     # ====================================
     try:
-        response = requests.get(f"{BACKEND_URL}/api/metrics", timeout=5)
+        metrics = get_with_etag("/api/metrics", timeout=5)
         
-        if response.status_code == 200:
-            metrics = response.json()
+        if metrics is not None:
             
             # ====================================
             # MODERN METRICS CARDS SECTION
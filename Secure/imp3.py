@@ -21,7 +21,7 @@ st.set_page_config(
 
 # Backend URL
 BACKEND_URL = "http://localhost:8000"
-WS_URL = "ws://localhost:8000/ws/dashboard"
+WS_URL = "ws://localhost:8000/ws/dashboard?protocol=patch"
 
 # Base64 encoded images
 def get_base64_image(image_path):
@@ -734,10 +734,14 @@ if 'search_results' not in st.session_state:
     st.session_state.search_results = []
 if 'dashboard_data' not in st.session_state:
     st.session_state.dashboard_data = {}
+if 'etag_cache' not in st.session_state:
+    st.session_state.etag_cache = {}
 if 'selected_risk' not in st.session_state:
     st.session_state.selected_risk = "all"
 if 'realtime_metrics' not in st.session_state:
     st.session_state.realtime_metrics = {}
+if 'realtime_alerts' not in st.session_state:
+    st.session_state.realtime_alerts = []
 if 'websocket_connected' not in st.session_state:
     st.session_state.websocket_connected = False
 if 'active_tab' not in st.session_state:
@@ -747,10 +751,25 @@ if 'active_tab' not in st.session_state:
 # REAL-TIME WEBSOCKET MANAGER
 # ================================
 
+def apply_metrics_patch(metrics, ops):
+    """Apply JSON-patch operations from the dashboard socket to a metrics dict"""
+    patched = json.loads(json.dumps(metrics))
+    for op in ops:
+        keys = [k.replace('~1', '/').replace('~0', '~') for k in op['path'].split('/')[1:]]
+        target = patched
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+        if op['op'] == 'remove':
+            target.pop(keys[-1], None)
+        else:
+            target[keys[-1]] = op['value']
+    return patched
+
 class RealTimeWebSocketManager:
     def __init__(self):
         self.connected = False
         self.ws = None
+        self.seq = None
         
     def start_connection(self):
         try:
@@ -774,6 +793,19 @@ class RealTimeWebSocketManager:
             data = json.loads(message)
             if data.get('type') in ['initial', 'update']:
                 st.session_state.realtime_metrics = data.get('data', {})
+                self.seq = data.get('seq')
+            elif data.get('type') == 'patch':
+                # Patches must follow our snapshot in order; otherwise ask for a new one
+                if self.seq is None or data.get('seq') != self.seq + 1:
+                    self.seq = None
+                    ws.send('resync')
+                    return
+                st.session_state.realtime_metrics = apply_metrics_patch(
+                    st.session_state.realtime_metrics, data.get('ops', [])
+                )
+                self.seq = data['seq']
+            elif data.get('type') == 'alert':
+                st.session_state.realtime_alerts = ([data.get('data', {})] + st.session_state.realtime_alerts)[:10]
         except:
             pass
     
@@ -813,28 +845,46 @@ def load_examples():
     except Exception as e:
         return False
 
+def get_with_etag(path, timeout=None):
+    """GET a backend JSON resource, reusing the last copy when the backend answers 304"""
+    cached = st.session_state.etag_cache.get(path)
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+    
+    response = requests.get(f"{BACKEND_URL}{path}", headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached:
+        return cached["data"]
+    
+    if response.status_code == 200:
+        data = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            st.session_state.etag_cache[path] = {"etag": etag, "data": data}
+        return data
+    
+    return None
+
 def load_dashboard_data():
     """Load dashboard analytics data"""
     try:
         # Load metrics
-        metrics_response = requests.get(f"{BACKEND_URL}/api/metrics")
-        if metrics_response.status_code == 200:
-            st.session_state.dashboard_data['metrics'] = metrics_response.json()
+        metrics = get_with_etag("/api/metrics")
+        if metrics is not None:
+            st.session_state.dashboard_data['metrics'] = metrics
         
         # Load top risks
-        risks_response = requests.get(f"{BACKEND_URL}/api/top-risks?limit=10")
-        if risks_response.status_code == 200:
-            st.session_state.dashboard_data['top_risks'] = risks_response.json()
+        top_risks = get_with_etag("/api/top-risks?limit=10")
+        if top_risks is not None:
+            st.session_state.dashboard_data['top_risks'] = top_risks
         
         # Load risk breakdown
-        breakdown_response = requests.get(f"{BACKEND_URL}/api/risk-breakdown")
-        if breakdown_response.status_code == 200:
-            st.session_state.dashboard_data['breakdown'] = breakdown_response.json()
+        breakdown = get_with_etag("/api/risk-breakdown")
+        if breakdown is not None:
+            st.session_state.dashboard_data['breakdown'] = breakdown
         
         # Load heatmap data
-        heatmap_response = requests.get(f"{BACKEND_URL}/api/heatmap?limit=15")
-        if heatmap_response.status_code == 200:
-            st.session_state.dashboard_data['heatmap'] = heatmap_response.json()
+        heatmap = get_with_etag("/api/heatmap?limit=15")
+        if heatmap is not None:
+            st.session_state.dashboard_data['heatmap'] = heatmap
             
         return True
     except Exception as e:
@@ -1470,6 +1520,14 @@ def render_realtime_tab():
     if not st.session_state.websocket_connected:
         websocket_manager.start_connection()
     
+    # Critical risks pushed by the server as they are found
+    for alert in st.session_state.realtime_alerts[:3]:
+        render_neon_alert(
+            f"Critical risk: {alert.get('source_drug')} ↔ {alert.get('target_drug')} "
+            f"({alert.get('combined_risk', 0)}%) - {alert.get('risk_reason', '')}",
+            "danger"
+        )
+    
     # Display Real-time Metrics
     metrics = st.session_state.realtime_metrics or {}
     
@@ -0,0 +1,77 @@
+"""Durable analysis queue: one open job per drug, bounded retries for lost runs."""
+import threading
+from datetime import datetime, timedelta
+
+import backend3
+from backend3 import AnalysisJob, AnalysisWorker, Drug, DrugETL
+
+
+def add_drug(name):
+    db = backend3.SessionLocal()
+    try:
+        drug = Drug(openfda_id=f"test_{name}", brand_name=name)
+        db.add(drug)
+        db.commit()
+        db.refresh(drug)
+        return drug
+    finally:
+        db.close()
+
+
+def open_jobs(drug_id):
+    db = backend3.SessionLocal()
+    try:
+        return db.query(AnalysisJob).filter(
+            AnalysisJob.drug_id == drug_id, AnalysisJob.status.in_(["pending", "running"])
+        ).all()
+    finally:
+        db.close()
+
+
+def test_concurrent_enqueues_share_one_open_job(db_engine):
+    drug = add_drug("Lamictal")
+    barrier = threading.Barrier(8)
+    job_ids = []
+
+    def enqueue():
+        db = backend3.SessionLocal()
+        try:
+            barrier.wait()
+            job_ids.append(DrugETL.enqueue_analysis(db, drug).id)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=enqueue) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(job_ids) == 8 and len(set(job_ids)) == 1
+    assert len(open_jobs(drug.id)) == 1
+
+
+def test_stale_sweep_fails_jobs_out_of_attempts(db_engine):
+    retried, exhausted = add_drug("Celebrex"), add_drug("Celexa")
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    db = backend3.SessionLocal()
+    try:
+        db.add_all([
+            AnalysisJob(drug_id=retried.id, status="running", attempts=1, max_attempts=3, started_at=long_ago),
+            AnalysisJob(drug_id=exhausted.id, status="running", attempts=3, max_attempts=3, started_at=long_ago),
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    worker = AnalysisWorker(process_workers=0, concurrency=1, poll_interval=1, retry_delay=1,
+                            job_timeout=60, sweep_interval=60)
+    worker._requeue_stale_jobs()
+
+    db = backend3.SessionLocal()
+    try:
+        status = {job.drug_id: job.status for job in db.query(AnalysisJob).all()}
+    finally:
+        db.close()
+    assert status == {retried.id: "pending", exhausted.id: "failed"}
+    assert worker.stats_snapshot()["jobs_failed"] == 1
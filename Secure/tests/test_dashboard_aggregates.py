@@ -0,0 +1,116 @@
+"""Trigger-maintained dashboard_aggregates must match a recount of confusion_risks."""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import backend3
+from backend3 import ConfusionRisk, Drug
+
+
+def aggregated(conn):
+    rows = conn.execute(text("""
+        SELECT split_part(metric, '#', 1), sum(row_count), sum(risk_count), sum(risk_sum)
+        FROM dashboard_aggregates WHERE metric LIKE 'risks:%'
+        GROUP BY 1 HAVING sum(row_count) <> 0
+    """))
+    return {metric: (count, scored, round(total, 6)) for metric, count, scored, total in rows}
+
+
+def recounted(conn):
+    rows = conn.execute(text("""
+        SELECT 'risks:' || coalesce(risk_category, ''), count(*),
+               count(*) FILTER (WHERE combined_risk >= 25),
+               coalesce(sum(combined_risk) FILTER (WHERE combined_risk >= 25), 0)
+        FROM confusion_risks GROUP BY risk_category
+    """))
+    return {metric: (count, scored, round(total, 6)) for metric, count, scored, total in rows}
+
+
+def test_triggers_track_inserts_updates_and_deletes(db_engine):
+    assert backend3.dashboard_aggregates_state["enabled"]
+
+    db = backend3.SessionLocal()
+    try:
+        drugs = [Drug(openfda_id=f"test_{i}", brand_name=f"Drug{i}") for i in range(9)]
+        db.add_all(drugs)
+        db.flush()
+        db.add_all(
+            ConfusionRisk(
+                source_drug_id=drugs[0].id,
+                target_drug_id=drug.id,
+                combined_risk=10 * i,
+                risk_category=["low", "medium", "high", "critical"][i % 4],
+                risk_reason="test",
+            )
+            for i, drug in enumerate(drugs[1:])
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    with db_engine.begin() as conn:
+        assert aggregated(conn) == recounted(conn)
+
+        # One statement moving rows both into and out of categories
+        conn.execute(text("""
+            UPDATE confusion_risks SET
+                risk_category = CASE risk_category WHEN 'low' THEN 'critical' WHEN 'critical' THEN 'low' ELSE 'high' END,
+                combined_risk = combined_risk + 5
+        """))
+        assert aggregated(conn) == recounted(conn)
+
+        conn.execute(text("DELETE FROM confusion_risks WHERE risk_category = 'high'"))
+        assert aggregated(conn) == recounted(conn)
+
+
+def test_writers_on_different_connections_do_not_share_counter_rows(db_engine):
+    shards = backend3.DASHBOARD_COUNTER_SHARDS
+    first = db_engine.connect()
+    others = []
+    try:
+        first_shard = first.execute(text("SELECT pg_backend_pid()")).scalar() % shards
+        first.execute(text("INSERT INTO analysis_logs (drug_name) VALUES ('first')"))
+
+        # A second open transaction on another shard must not wait for the first
+        for _ in range(shards + 1):
+            second = db_engine.connect()
+            others.append(second)
+            if second.execute(text("SELECT pg_backend_pid()")).scalar() % shards != first_shard:
+                break
+        else:
+            pytest.skip("no connection on another shard")
+        second.execute(text("SET LOCAL lock_timeout = '1s'"))
+        try:
+            second.execute(text("INSERT INTO analysis_logs (drug_name) VALUES ('second')"))
+        except OperationalError:
+            pytest.fail("second writer blocked on the first writer's counter rows")
+        second.commit()
+        first.commit()
+    finally:
+        first.close()
+        for other in others:
+            other.close()
+
+    db = backend3.SessionLocal()
+    try:
+        assert backend3.read_dashboard_aggregates(db)["total_analyses"] == 2
+        assert backend3.get_data_versions(db)["analysis_logs"] >= 2
+    finally:
+        db.close()
+
+
+def test_startup_recounts_only_when_triggers_are_missing(db_engine, monkeypatch):
+    with db_engine.begin() as conn:
+        conn.execute(text("UPDATE dashboard_aggregates SET row_count = 100 WHERE metric = 'drugs'"))
+
+    def total_drugs():
+        db = backend3.SessionLocal()
+        try:
+            assert backend3.ensure_dashboard_aggregates(db)
+            return backend3.read_dashboard_aggregates(db)["total_drugs"]
+        finally:
+            db.close()
+
+    assert total_drugs() == 100
+    monkeypatch.setattr(backend3, "DASHBOARD_REBUILD_ON_STARTUP", True)
+    assert total_drugs() == 0
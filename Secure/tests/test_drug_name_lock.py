@@ -0,0 +1,34 @@
+"""drug_name_lock must exclude holders on separate connections (as separate processes are)."""
+import asyncio
+
+import backend3
+
+
+def test_second_holder_waits_for_the_first(db_engine):
+    events = []
+
+    async def hold(name, key, seconds):
+        async with backend3.drug_name_lock(key):
+            events.append(f"{name} in")
+            await asyncio.sleep(seconds)
+            events.append(f"{name} out")
+
+    async def main():
+        first = asyncio.create_task(hold("a", "lamictal", 0.3))
+        await asyncio.sleep(0.05)
+        await asyncio.gather(first, hold("b", "lamictal", 0), hold("c", "celebrex", 0))
+
+    asyncio.run(main())
+    assert events.index("b in") > events.index("a out")
+    assert events.index("c in") < events.index("a out")
+
+
+def test_holders_do_not_use_the_request_pool(db_engine):
+    checked_out = []
+
+    async def main():
+        async with backend3.drug_name_lock("lamictal"), backend3.drug_name_lock("celebrex"):
+            checked_out.append(backend3.engine.pool.checkedout())
+
+    asyncio.run(main())
+    assert checked_out == [0]
@@ -0,0 +1,55 @@
+"""OpenFDACache size accounting and eviction."""
+import backend3
+from backend3 import OpenFDACache
+
+RESULTS = [{"openfda": {"brand_name": ["Lamictal"], "generic_name": ["lamotrigine"]}}]
+
+
+def stored_bytes(cache):
+    return cache._connect().execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+
+def test_total_bytes_tracks_puts_and_replacements():
+    cache = OpenFDACache("", max_bytes=10 ** 6)
+    cache.put("lamictal", 5, RESULTS)
+    cache.put("celebrex", 5, [])
+    cache.put("lamictal", 5, RESULTS * 3)
+    assert cache.total_bytes == stored_bytes(cache)
+    assert cache.stats()["entries"] == 2
+
+
+def test_eviction_drops_least_recently_used_and_keeps_total_in_sync():
+    probe = OpenFDACache("")
+    probe.put("probe", 5, RESULTS)
+    entry_size = probe.total_bytes
+
+    cache = OpenFDACache("", max_bytes=2 * entry_size + entry_size // 2)
+    for term in ["alpha", "bravo"]:
+        cache.put(term, 5, RESULTS)
+    assert cache.get("alpha", 5) == RESULTS
+    cache.put("charl", 5, RESULTS)
+
+    assert cache.get("bravo", 5) is None
+    assert cache.get("alpha", 5) == RESULTS
+    assert cache.evictions == 1
+    assert cache.total_bytes == stored_bytes(cache) <= cache.max_bytes
+
+
+def test_total_bytes_loaded_from_existing_file(tmp_path):
+    path = str(tmp_path / "openfda.sqlite")
+    first = OpenFDACache(path)
+    first.put("lamictal", 5, RESULTS)
+    first.conn.close()
+
+    reopened = OpenFDACache(path)
+    assert reopened.stats()["bytes"] == first.total_bytes > 0
+
+
+def test_key_follows_the_term_as_sent_and_the_search_mode(monkeypatch):
+    cache = OpenFDACache("")
+    cache.put("Lamictal", 5, RESULTS)
+    assert cache.get("lamictal", 5) is None
+    assert cache.get("Lamictal", 5) == RESULTS
+
+    monkeypatch.setattr(backend3, "OPENFDA_SEARCH_MODE", "race")
+    assert cache.get("Lamictal", 5) is None
@@ -0,0 +1,160 @@
+"""OpenFDAClient against a local stub of the openFDA label endpoint."""
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import backend3
+from backend3 import OpenFDAClient
+
+LABEL = {"openfda": {"brand_name": ["Lamictal"], "generic_name": ["lamotrigine"], "product_ndc": ["0173-0633"]}}
+
+
+class StubOpenFDA:
+    """Answers from a handler function and records requests and client connections"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.connections = set()
+
+    async def handle(self, request):
+        self.requests.append(request.query["search"])
+        self.connections.add(request.transport.get_extra_info("peername"))
+        return await self.handler(request)
+
+
+@pytest.fixture(autouse=True)
+def isolated_client(monkeypatch):
+    monkeypatch.setattr(backend3, "openfda_cache", backend3.OpenFDACache(""))
+    monkeypatch.setattr(backend3, "OPENFDA_SEARCH_MODE", "sequential")
+    monkeypatch.setattr(OpenFDAClient, "_session", None)
+
+
+def run_against(handler, scenario):
+    """Start a stub server, point the client at it and run scenario(stub)"""
+    stub = StubOpenFDA(handler)
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/drug/label.json", stub.handle)
+        server = TestServer(app)
+        await server.start_server()
+        OpenFDAClient.BASE_URL = str(server.make_url("/drug/label.json"))
+        try:
+            return await scenario(stub)
+        finally:
+            await OpenFDAClient.close()
+            await server.close()
+
+    original_url = OpenFDAClient.BASE_URL
+    try:
+        return asyncio.run(main())
+    finally:
+        OpenFDAClient.BASE_URL = original_url
+
+
+def test_session_and_connection_reused_across_lookups():
+    async def handler(request):
+        return web.json_response({"results": [LABEL]})
+
+    async def scenario(stub):
+        await OpenFDAClient.search_drugs("lamictal", limit=5)
+        session = OpenFDAClient._session
+        for term in ["lamotrigine", "celebrex", "metformin"]:
+            assert await OpenFDAClient.search_drugs(term, limit=5) == [LABEL]
+            assert OpenFDAClient._session is session
+        return stub
+
+    stub = run_against(handler, scenario)
+    assert len(stub.requests) == 4
+    assert len(stub.connections) == 1
+
+
+def test_not_found_tries_every_pattern_and_returns_empty():
+    async def handler(request):
+        return web.json_response({"error": {"code": "NOT_FOUND"}}, status=404)
+
+    async def scenario(stub):
+        return await OpenFDAClient.search_drugs("notadrug", limit=5), stub
+
+    results, stub = run_against(handler, scenario)
+    assert results == []
+    assert len(stub.requests) == 5
+
+
+def test_not_found_is_cached_as_negative_result():
+    async def handler(request):
+        return web.json_response({"error": {"code": "NOT_FOUND"}}, status=404)
+
+    async def scenario(stub):
+        await OpenFDAClient.search_drugs("notadrug", limit=5)
+        return await OpenFDAClient.search_drugs("notadrug", limit=5), stub
+
+    results, stub = run_against(handler, scenario)
+    assert results == []
+    assert len(stub.requests) == 5
+
+
+def test_server_error_returns_empty_and_is_not_cached():
+    async def handler(request):
+        return web.json_response({}, status=500)
+
+    async def scenario(stub):
+        first = await OpenFDAClient.search_drugs("lamictal", limit=5)
+        second = await OpenFDAClient.search_drugs("lamictal", limit=5)
+        return first, second, stub
+
+    first, second, stub = run_against(handler, scenario)
+    assert first == [] and second == []
+    # Every pattern is tried on both lookups: nothing was cached
+    assert len(stub.requests) == 10
+
+
+def test_failing_pattern_does_not_stop_the_remaining_ones():
+    async def handler(request):
+        if request.query["search"].startswith("openfda.brand_name:"):
+            return web.json_response({"error": {"code": "BAD_REQUEST"}}, status=400)
+        return web.json_response({"results": [LABEL]})
+
+    async def scenario(stub):
+        return await OpenFDAClient.search_drugs("lamictal", limit=5), stub
+
+    results, stub = run_against(handler, scenario)
+    assert results == [LABEL]
+    assert len(stub.requests) == 2
+    assert backend3.openfda_cache.get("lamictal", 5) == [LABEL]
+
+
+def test_timeout_returns_empty_and_is_not_cached(monkeypatch):
+    monkeypatch.setattr(backend3, "OPENFDA_TIMEOUT", 0.2)
+
+    async def handler(request):
+        await asyncio.sleep(2)
+        return web.json_response({"results": [LABEL]})
+
+    async def scenario(stub):
+        first = await OpenFDAClient.search_drugs("lamictal", limit=5)
+        second = await OpenFDAClient.search_drugs("lamictal", limit=5)
+        return first, second, stub
+
+    first, second, stub = run_against(handler, scenario)
+    assert first == [] and second == []
+    assert backend3.openfda_cache.get("lamictal", 5) is None
+
+
+def test_or_mode_sends_one_query_and_ranks_brand_matches_first(monkeypatch):
+    monkeypatch.setattr(backend3, "OPENFDA_SEARCH_MODE", "or")
+    generic_hit = {"openfda": {"brand_name": ["Other"], "generic_name": ["lamictal"]}}
+
+    async def handler(request):
+        return web.json_response({"results": [generic_hit, LABEL]})
+
+    async def scenario(stub):
+        return await OpenFDAClient.search_drugs("lamictal", limit=5), stub
+
+    results, stub = run_against(handler, scenario)
+    assert results == [LABEL, generic_hit]
+    assert len(stub.requests) == 1
+    assert " OR " in stub.requests[0]
@@ -0,0 +1,27 @@
+"""PairScoreCache shared with scoring processes through seed/record/merge."""
+from backend3 import PairScoreCache
+
+NAMES = ["lamisil", "lamotrine", "celebrex"]
+
+
+def test_worker_results_merge_back_into_the_main_cache():
+    main = PairScoreCache(maxsize=100)
+    main.spelling_components("lamictal", "lamisil")
+
+    # What the analysis worker sends a scoring process, and what comes back
+    known = main.known_pairs("lamictal", NAMES)
+    worker = PairScoreCache(maxsize=100)
+    worker.use_in_worker()
+    worker.seed(known)
+    scores = worker.spelling_components_many("lamictal", NAMES)
+    computed, hits = worker.take_recorded()
+
+    assert scores == [PairScoreCache.compute("lamictal", name) for name in NAMES]
+    assert len(known) == 1 and hits == 1 and len(computed) == 2
+
+    main.merge(computed, hits)
+    assert main.known_pairs("lamictal", NAMES).keys() == {PairScoreCache._key("lamictal", name) for name in NAMES}
+    assert (main.hits, main.misses) == (1, 3)
+
+    # Recorded entries are handed over once
+    assert worker.take_recorded() == ({}, 0)
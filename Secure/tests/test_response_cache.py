@@ -0,0 +1,31 @@
+"""cached_response keeps real responses and skips demo fallbacks."""
+import asyncio
+
+import backend3
+
+
+class BrokenSession:
+    def query(self, *args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+
+def test_fallback_responses_are_not_cached(monkeypatch):
+    cache = backend3.ResponseCache(60)
+    monkeypatch.setattr(backend3, "response_cache", cache)
+
+    assert asyncio.run(backend3.get_top_risks(limit=5, db=BrokenSession())) == []
+    assert cache.stats()["entries"] == 0
+
+
+def test_real_responses_are_cached(monkeypatch):
+    cache = backend3.ResponseCache(60)
+    monkeypatch.setattr(backend3, "response_cache", cache)
+    calls = []
+
+    @backend3.cached_response
+    async def endpoint(limit: int):
+        calls.append(limit)
+        return {"limit": limit}
+
+    assert asyncio.run(endpoint(limit=3)) == asyncio.run(endpoint(limit=3)) == {"limit": 3}
+    assert calls == [3]
@@ -0,0 +1,53 @@
+"""The vectorized scorer must match the scalar AdvancedRiskAnalyzer path."""
+from types import SimpleNamespace
+
+import pytest
+
+from backend3 import AdvancedRiskAnalyzer
+
+NAMES = [
+    "Lamictal", "lamisil", "Lamictel", "Celebrex", "celexa", "Cerebyx", "Metformin",
+    "metronidazole", "Clonidine", "klonopin", "Hydralazine", "hydroxyzine", "Lisinopril",
+    "Omeprazole", "Diazepam", "lorazepam", "Atorvastatin", "simvastatin", "Warfarin",
+    "Xarelto", "Zyrtec", "Zyprexa", "heparin", "Methadone", "a", "",
+]
+PURPOSES = [
+    "pain relief", "infection and inflammation", "blood pressure and heart", "",
+    None, "anxiety", "depression, anxiety", "allergy", "cholesterol diabetes",
+]
+TOLERANCE = 1e-6
+
+
+def make_drugs():
+    return [
+        SimpleNamespace(
+            brand_name=name,
+            generic_name=NAMES[(i * 7) % len(NAMES)].lower(),
+            purpose=PURPOSES[i % len(PURPOSES)],
+        )
+        for i, name in enumerate(NAMES)
+    ]
+
+
+@pytest.mark.parametrize("query_index", range(len(NAMES)))
+def test_batch_scores_match_scalar(query_index):
+    drugs = make_drugs()
+    query = drugs[query_index]
+    batch = AdvancedRiskAnalyzer.score_one_against_many(query, drugs)
+
+    for i, other in enumerate(drugs):
+        spelling = AdvancedRiskAnalyzer.calculate_spelling_similarity(query.brand_name, other.brand_name)
+        phonetic = AdvancedRiskAnalyzer.calculate_phonetic_similarity(query.brand_name, other.brand_name)
+        therapeutic = AdvancedRiskAnalyzer.analyze_therapeutic_context(query, other)
+        expected = AdvancedRiskAnalyzer.calculate_combined_risk(spelling, phonetic, therapeutic)
+        row = AdvancedRiskAnalyzer.batch_result_row(batch, i)
+
+        pair = (query.brand_name, other.brand_name)
+        assert row["combined_risk"] == pytest.approx(expected["combined_risk"], abs=TOLERANCE), pair
+        assert batch["spelling"][i] == pytest.approx(spelling["score"], abs=TOLERANCE), pair
+        assert row["levenshtein"] == pytest.approx(spelling["levenshtein"], abs=TOLERANCE), pair
+        assert row["components"] == pytest.approx(expected["components"], abs=TOLERANCE), pair
+        assert row["risk_category"] == expected["risk_category"], pair
+        assert row["risk_reason"] == expected["risk_reason"], pair
+        assert row["soundex_match"] == phonetic["soundex_match"], pair
+        assert row["metaphone_match"] == phonetic["metaphone_match"], pair
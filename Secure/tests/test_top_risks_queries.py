@@ -0,0 +1,50 @@
+"""/api/top-risks data must stay a constant number of queries as limit grows."""
+import pytest
+from sqlalchemy import event
+
+import backend3
+from backend3 import ConfusionRisk, Drug
+
+
+def seed(db, risk_count):
+    drugs = [Drug(openfda_id=f"test_{i}", brand_name=f"Drug{i}") for i in range(risk_count + 1)]
+    db.add_all(drugs)
+    db.flush()
+    db.add_all(
+        ConfusionRisk(
+            source_drug_id=drugs[0].id,
+            target_drug_id=drug.id,
+            combined_risk=50 + (i % 50),
+            risk_category="high",
+            risk_reason="test",
+        )
+        for i, drug in enumerate(drugs[1:])
+    )
+    db.commit()
+
+
+def count_queries(engine, func):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = func()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, len(statements)
+
+
+@pytest.mark.parametrize("limit", [5, 50])
+def test_top_risks_query_count_is_constant(db_engine, limit):
+    db = backend3.SessionLocal()
+    try:
+        seed(db, 55)
+        db.expunge_all()
+
+        risks, queries = count_queries(db_engine, lambda: backend3.get_top_risks_data(db, limit))
+
+        assert len(risks) == limit
+        assert risks[0]["drug1"] == "Drug0"
+        assert queries == 1
+    finally:
+        db.close()
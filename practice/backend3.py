@@ -4,7 +4,7 @@ from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime,
 from sqlalchemy.orm import sessionmaker, Session, relationship, declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Set
 from pydantic import BaseModel
 import requests
 import logging
@@ -201,19 +201,35 @@ class SystemMetrics(Base):
 
 # ==================== REAL-TIME DASHBOARD MANAGER ====================
 
+# Seconds between metric pushes to /ws/dashboard clients
+METRICS_PUBLISH_INTERVAL = float(os.getenv("METRICS_PUBLISH_INTERVAL", "5"))
+
+# Messages buffered per client before the oldest ones are dropped
+WEBSOCKET_SEND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "32"))
+
 class RealTimeDashboardManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
+        self.send_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self.writer_tasks: Dict[WebSocket, asyncio.Task] = {}
         self.last_metrics = {}
+        self.last_metrics_at = 0.0
+        self.publisher_task: Optional[asyncio.Task] = None
         self.connection_stats = {
             "total_connections": 0,
             "peak_connections": 0,
-            "messages_sent": 0
+            "messages_sent": 0,
+            "messages_dropped": 0,
+            "queued_messages": 0,
+            "peak_queue_depth": 0
         }
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        queue = asyncio.Queue(maxsize=WEBSOCKET_SEND_QUEUE_SIZE)
+        self.active_connections.add(websocket)
+        self.send_queues[websocket] = queue
+        self.writer_tasks[websocket] = asyncio.create_task(self._writer(websocket, queue))
         self.connection_stats["total_connections"] += 1
         self.connection_stats["peak_connections"] = max(
             self.connection_stats["peak_connections"], 
@@ -222,32 +238,110 @@ class RealTimeDashboardManager:
         logger.info(f"New WebSocket connection. Total: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
+        queue = self.send_queues.pop(websocket, None)
+        if queue is not None:
+            self.connection_stats["queued_messages"] -= queue.qsize()
+        task = self.writer_tasks.pop(websocket, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
         logger.info(f"WebSocket disconnected. Total: {len(self.active_connections)}")
     
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients"""
-        disconnected = []
-        for connection in self.active_connections:
+    async def _writer(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Drain one client's send queue so a slow socket only delays itself"""
+        while True:
+            message = await queue.get()
+            self.connection_stats["queued_messages"] -= 1
             try:
-                await connection.send_json(message)
+                await websocket.send_json(message)
                 self.connection_stats["messages_sent"] += 1
             except Exception as e:
                 logger.error(f"Error sending to WebSocket: {e}")
-                disconnected.append(connection)
-        
-        for connection in disconnected:
-            self.disconnect(connection)
+                self.disconnect(websocket)
+                return
+    
+    def _enqueue(self, message: dict, websocket: WebSocket):
+        """Queue a message for a client, dropping its oldest one when full"""
+        queue = self.send_queues.get(websocket)
+        if queue is None:
+            return
+        
+        if queue.full():
+            queue.get_nowait()
+            self.connection_stats["queued_messages"] -= 1
+            self.connection_stats["messages_dropped"] += 1
+        
+        queue.put_nowait(message)
+        self.connection_stats["queued_messages"] += 1
+        self.connection_stats["peak_queue_depth"] = max(
+            self.connection_stats["peak_queue_depth"],
+            queue.qsize()
+        )
+    
+    async def broadcast(self, message: dict):
+        """Broadcast message to all connected clients"""
+        for connection in list(self.active_connections):
+            self._enqueue(message, connection)
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send message to specific client"""
-        try:
-            await websocket.send_json(message)
-            self.connection_stats["messages_sent"] += 1
-        except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+        self._enqueue(message, websocket)
+    
+    async def current_metrics(self) -> Dict[str, Any]:
+        """Latest published metrics, recomputed if older than one publish interval.
+        
+        The publisher idles without clients, so the first client after a quiet
+        period would otherwise get whatever was published before it.
+        """
+        if not self.last_metrics or time.time() - self.last_metrics_at >= METRICS_PUBLISH_INTERVAL:
+            db = SessionLocal()
+            try:
+                self.last_metrics = await get_realtime_metrics(db)
+                self.last_metrics_at = time.time()
+            finally:
+                db.close()
+        return self.last_metrics
+    
+    async def _publish_loop(self, interval: float):
+        """Compute metrics once per interval and broadcast them to every client"""
+        while True:
+            await asyncio.sleep(interval)
+            if not self.active_connections:
+                continue
+            
+            try:
+                db = SessionLocal()
+                try:
+                    metrics = await get_realtime_metrics(db)
+                    self.last_metrics_at = time.time()
+                finally:
+                    db.close()
+                
+                # Only send if metrics changed
+                if metrics != self.last_metrics:
+                    self.last_metrics = metrics
+                    await self.broadcast({
+                        "type": "update",
+                        "data": metrics,
+                        "timestamp": datetime.utcnow().isoformat()
+                    })
+            except Exception as e:
+                logger.error(f"Error publishing metrics: {e}")
+    
+    def start_publisher(self, interval: float = METRICS_PUBLISH_INTERVAL):
+        """Start the shared metrics publisher task"""
+        if self.publisher_task is None or self.publisher_task.done():
+            self.publisher_task = asyncio.create_task(self._publish_loop(interval))
+    
+    async def stop_publisher(self):
+        """Cancel the metrics publisher task"""
+        if self.publisher_task is not None:
+            self.publisher_task.cancel()
+            try:
+                await self.publisher_task
+            except asyncio.CancelledError:
+                pass
+            self.publisher_task = None
 
 dashboard_manager = RealTimeDashboardManager()
 
@@ -1438,63 +1532,27 @@ async def websocket_dashboard(websocket: WebSocket):
     await dashboard_manager.connect(websocket)
     
     try:
-        db = SessionLocal()
-        
-        try:
-            # Send initial metrics
-            metrics = await get_realtime_metrics(db)
-            await websocket.send_json({
-                "type": "initial",
-                "data": metrics,
-                "timestamp": datetime.utcnow().isoformat()
-            })
-            
-            # Keep connection alive and send updates
-            last_update = time.time()
-            last_metrics = metrics
-            
-            while True:
-                try:
-                    # Check for ping messages
-                    try:
-                        data = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-                        if data == "ping":
-                            await websocket.send_json({
-                                "type": "pong", 
-                                "timestamp": datetime.utcnow().isoformat()
-                            })
-                    except asyncio.TimeoutError:
-                        pass
-                    
-                    # Send updates every 5 seconds
-                    current_time = time.time()
-                    if current_time - last_update >= 5:
-                        new_metrics = await get_realtime_metrics(db)
-                        
-                        # Only send if metrics changed
-                        if new_metrics != last_metrics:
-                            await websocket.send_json({
-                                "type": "update",
-                                "data": new_metrics,
-                                "timestamp": datetime.utcnow().isoformat()
-                            })
-                            last_metrics = new_metrics
-                        
-                        last_update = current_time
-                    
-                    await asyncio.sleep(0.1)
-                    
-                except WebSocketDisconnect:
-                    break
-                except Exception as e:
-                    logger.error(f"WebSocket error: {e}")
-                    break
-                    
-        finally:
-            db.close()
-            
+        # Send initial metrics; updates come from the shared publisher
+        metrics = await dashboard_manager.current_metrics()
+        await dashboard_manager.send_personal_message({
+            "type": "initial",
+            "data": metrics,
+            "timestamp": datetime.utcnow().isoformat()
+        }, websocket)
+        
+        # Keep connection alive and answer pings
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await dashboard_manager.send_personal_message({
+                    "type": "pong", 
+                    "timestamp": datetime.utcnow().isoformat()
+                }, websocket)
+                
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
-        logger.error(f"WebSocket setup error: {e}")
+        logger.error(f"WebSocket error: {e}")
     finally:
         dashboard_manager.disconnect(websocket)
 
@@ -1742,10 +1800,18 @@ async def startup_event():
     print("   2. Search: curl http://localhost:8000/api/search/lamictal")
     print("   3. Check dashboard: http://localhost:8000/api/metrics")
     
+    # Start the shared real-time metrics publisher
+    dashboard_manager.start_publisher()
+    
     print("="*60)
     print("✅ Medication Safety Guard v3.0 is ready!")
     print("="*60 + "\n")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Application shutdown event"""
+    await dashboard_manager.stop_publisher()
+
 # ==================== MAIN EXECUTION ====================
 
 if __name__ == "__main__":